@@ -1,15 +1,30 @@
 from __future__ import annotations
-from fastapi import FastAPI, Query
-from fastapi.responses import HTMLResponse, JSONResponse
+from cachetools import TTLCache
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from datetime import date
+from html import escape
+import hashlib
 import os
-import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
 
 DATABASE_URL = os.environ["DATABASE_URL"]
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# asyncpg driver so DB I/O doesn't block the event loop
+ASYNC_DATABASE_URL = (
+    DATABASE_URL.replace("postgres://", "postgresql://", 1)
+                .replace("postgresql://", "postgresql+asyncpg://", 1)
+)
+engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True)
 
-app = FastAPI(title="CBB Board")
+# Predictions change at most once a day (after the 9:05am job), so serve
+# repeat views from memory and let the TTL bound staleness.
+CACHE_TTL = 300
+_api_cache: TTLCache = TTLCache(maxsize=64, ttl=CACHE_TTL)
+_table_cache: TTLCache = TTLCache(maxsize=64, ttl=CACHE_TTL)
+CACHE_HEADERS = {"Cache-Control": f"public, max-age={CACHE_TTL}"}
 
 TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS predictions (
@@ -27,56 +42,98 @@ CREATE TABLE IF NOT EXISTS predictions (
   PRIMARY KEY (date, game_id)
 );
 """
-with engine.begin() as conn:
-    conn.exec_driver_sql(TABLE_SQL)
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_predictions_date_spread
+  ON predictions (date, home_spread, game_id)
+  INCLUDE (home_team_code, home_team_name, away_team_code, away_team_name,
+           prob_home_win, home_moneyline_nv, away_moneyline_nv, pred_home_margin);
+"""
+# Board order served straight off idx_predictions_date_spread (index-only scan, no sort)
+SELECT_SQL = """
+SELECT date, game_id, home_team_code, home_team_name, away_team_code, away_team_name,
+       pred_home_margin, home_spread, prob_home_win, home_moneyline_nv, away_moneyline_nv
+FROM predictions WHERE date = :d ORDER BY home_spread ASC, game_id
+"""
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # startup: make sure the table and its covering index exist
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(TABLE_SQL)
+        await conn.exec_driver_sql(INDEX_SQL)
+    yield
+    # shutdown: close pooled connections
+    await engine.dispose()
+
+app = FastAPI(title="CBB Board", lifespan=lifespan)
 
 @app.get("/api/predictions", response_class=JSONResponse)
-def api_predictions(d: str | None = Query(default=None)):
+async def api_predictions(d: str | None = Query(default=None)):
     d = d or date.today().isoformat()
-    with engine.begin() as conn:
-        rows = conn.execute(
-            text("""SELECT * FROM predictions WHERE date = :d ORDER BY home_spread ASC, game_id"""),
-            {"d": d}
-        ).mappings().all()
-    return {"date": d, "rows": [dict(r) for r in rows]}
+    # one lookup: a separate `in` check can pass and the entry still expire before the read
+    body = _api_cache.get(d)
+    if body is None:
+        async with engine.begin() as conn:
+            result = await conn.execute(text(SELECT_SQL), {"d": date.fromisoformat(d)})
+            rows = result.mappings().all()
+        payload = jsonable_encoder({"date": d, "rows": [dict(r) for r in rows]})
+        # cache the serialized bytes so hits skip JSON encoding too
+        body = JSONResponse(content=payload).body
+        _api_cache[d] = body
+    return Response(content=body, media_type="application/json", headers=CACHE_HEADERS)
 
-@app.get("/", response_class=HTMLResponse)
-def index(d: str | None = Query(default=None)):
-    d = d or date.today().isoformat()
-    with engine.begin() as conn:
-        df = pd.read_sql(
-            text("""SELECT * FROM predictions WHERE date = :d ORDER BY home_spread ASC, game_id"""),
-            conn, params={"d": d}
-        )
-    title = f"CBB Board — {d}"
-    if df.empty:
+# (header, column, format spec, scale) for each board column, in display order
+BOARD_COLUMNS = [
+    ("HOME", "home_team_code", "", 1),
+    ("Home Team", "home_team_name", "", 1),
+    ("AWAY", "away_team_code", "", 1),
+    ("Away Team", "away_team_name", "", 1),
+    ("Spread (Home -)", "home_spread", ".1f", 1),
+    ("Home Win %", "prob_home_win", ".1f", 100),
+    ("Home ML", "home_moneyline_nv", ".0f", 1),
+    ("Away ML", "away_moneyline_nv", ".0f", 1),
+    ("Pred Margin", "pred_home_margin", ".1f", 1),
+]
+
+def _fmt(v, spec: str, scale: float) -> str:
+    if v is None or v != v:  # NULL / NaN
+        return ""
+    if not spec:
+        return escape(str(v))
+    return format(v * scale, spec)
+
+async def render_table(d: str) -> tuple[str, str]:
+    """Board table HTML for `d` plus its ETag; cached per date so repeat views skip SQL + formatting."""
+    hit = _table_cache.get(d)
+    if hit is not None:
+        return hit
+    async with engine.begin() as conn:
+        result = await conn.execute(text(SELECT_SQL), {"d": date.fromisoformat(d)})
+        rows = result.mappings().all()
+    if not rows:
         body = f"<p>No predictions yet for <b>{d}</b>.</p><p>Check back after the 9:05am run.</p>"
     else:
-        # nicify columns
-        show = df[[
-            "home_team_code","home_team_name","away_team_code","away_team_name",
-            "home_spread","prob_home_win","home_moneyline_nv","away_moneyline_nv","pred_home_margin"
-        ]].copy()
-        show.rename(columns={
-            "home_team_code":"HOME",
-            "home_team_name":"Home Team",
-            "away_team_code":"AWAY",
-            "away_team_name":"Away Team",
-            "home_spread":"Spread (Home -)",
-            "prob_home_win":"Home Win %",
-            "home_moneyline_nv":"Home ML",
-            "away_moneyline_nv":"Away ML",
-            "pred_home_margin":"Pred Margin"
-        }, inplace=True)
-        # formatting
-        show["Home Win %"] = (show["Home Win %"]*100).round(1)
-        show["Spread (Home -)"] = show["Spread (Home -)"].round(1)
-        show["Pred Margin"] = show["Pred Margin"].round(1)
-        show["Home ML"] = show["Home ML"].round(0).astype("Int64").astype(str).str.replace("<NA>","")
-        show["Away ML"] = show["Away ML"].round(0).astype("Int64").astype(str).str.replace("<NA>","")
-        # simple HTML table
-        body = show.to_html(index=False, escape=False)
+        # simple HTML table, formatted straight from the rowset
+        head = "".join(f"<th>{label}</th>" for label, _, _, _ in BOARD_COLUMNS)
+        trs = "".join(
+            "<tr>" + "".join(f"<td>{_fmt(r[col], spec, scale)}</td>" for _, col, spec, scale in BOARD_COLUMNS) + "</tr>"
+            for r in rows
+        )
+        body = f'<table class="dataframe"><thead><tr>{head}</tr></thead><tbody>{trs}</tbody></table>'
+
+    etag = '"' + hashlib.sha1(f"{d}\n{body}".encode()).hexdigest() + '"'
+    _table_cache[d] = (body, etag)
+    return body, etag
 
+@app.get("/", response_class=HTMLResponse)
+async def index(request: Request, d: str | None = Query(default=None)):
+    d = d or date.today().isoformat()
+    body, etag = await render_table(d)
+    headers = {**CACHE_HEADERS, "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    title = f"CBB Board — {d}"
     html = f"""
 <!doctype html>
 <html>
@@ -108,4 +165,4 @@ def index(d: str | None = Query(default=None)):
 </body>
 </html>
 """
-    return HTMLResponse(html)
+    return HTMLResponse(html, headers=headers)
@@ -1,5 +1,6 @@
 # src/data/build_history.py
-import argparse, os, glob, pandas as pd, pyarrow as pa, pyarrow.parquet as pq
+import argparse, os, glob, pandas as pd, pyarrow as pa, pyarrow.dataset as ds, pyarrow.parquet as pq
+from datetime import date
 from pathlib import Path
 
 KEEP_COLS = [
@@ -11,28 +12,30 @@ KEEP_COLS = [
     "pts","opp_pts","margin","pbp_count","playerstatlines_count",
 ]
 
+INT_COLS = ["game_id","venue_id","team_id","opp_id","pbp_count","playerstatlines_count",
+            "pts","opp_pts","margin","attendance"]
+BOOL_COLS = ["neutral","is_home"]
+STR_COLS = ["status","start_time","overtime","venue_name","citystate",
+            "siteurl","apiurl","team_code","team_name","opp_code","opp_name"]
+# Arrow-backed dtypes: contiguous buffers that hand straight to pa.Table.from_pandas
+ARROW_DTYPES = {
+    **{c: "int64[pyarrow]" for c in INT_COLS},
+    **{c: "bool[pyarrow]" for c in BOOL_COLS},
+    **{c: "string[pyarrow]" for c in STR_COLS},
+}
+
 def coerce_types(df: pd.DataFrame) -> pd.DataFrame:
-    # Ensure all expected columns exist
-    for c in KEEP_COLS:
-        if c not in df.columns:
-            df[c] = pd.NA
+    # Ensure all expected columns exist (missing ones come back all-null)
+    df = df.reindex(columns=KEEP_COLS)
 
-    df = df[KEEP_COLS].copy()
+    # Text sources (CSV fallback) can carry numbers as strings; typed parquet columns skip this
+    for c in INT_COLS:
+        if not pd.api.types.is_numeric_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    # Basic type cleanups
+    # One cast for every column instead of a copy per column
+    df = df.astype(ARROW_DTYPES)
     df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
-    for c in ["game_id","venue_id","team_id","opp_id","pbp_count","playerstatlines_count"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
-    for c in ["pts","opp_pts","margin","attendance"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
-    # Booleans sometimes arrive as strings
-    df["neutral"] = df["neutral"].astype("boolean")
-    df["is_home"] = df["is_home"].astype("boolean")
-
-    # Strings
-    for c in ["status","start_time","overtime","venue_name","citystate",
-              "siteurl","apiurl","team_code","team_name","opp_code","opp_name"]:
-        df[c] = df[c].astype("string")
 
     return df
 
@@ -47,26 +50,43 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--daily-dir", default="data/interstat/daily")
     ap.add_argument("--out-file", default="data/interstat/history/games_teams.parquet")
+    ap.add_argument("--since", default=None, help="YYYY-MM-DD; only keep games on/after this date")
     args = ap.parse_args()
+    since = date.fromisoformat(args.since) if args.since else None
 
     daily_dir = Path(args.daily_dir)
-    files = sorted([*glob.glob(str(daily_dir / "*.parquet")),
-                    *glob.glob(str(daily_dir / "*.csv"))])
+    parquet_files = sorted(glob.glob(str(daily_dir / "*.parquet")))
+    csv_files = sorted(glob.glob(str(daily_dir / "*.csv")))
 
-    if not files:
+    if not parquet_files and not csv_files:
         print(f"No daily files found in {daily_dir}")
         return
 
     frames = []
-    for f in files:
+    if parquet_files:
+        # Scan all parquet days in one Arrow pass instead of a read/concat loop
+        schema = pa.unify_schemas([pq.read_schema(f) for f in parquet_files],
+                                  promote_options="permissive")
+        dataset = ds.dataset(parquet_files, schema=schema, format="parquet")
+        # Date filter is pushed down to row-group statistics, so older days are skipped unread
+        flt = (ds.field("date") >= pa.scalar(since, pa.date32())) if since else None
+        frames.append(coerce_types(dataset.to_table(filter=flt).to_pandas()))
+
+    # CSV days only exist when a parquet write failed; read and coerce those individually
+    # so one malformed fallback file is skipped rather than failing the whole build
+    for f in csv_files:
         try:
-            df = read_any(f)
-            df = coerce_types(df)
-            frames.append(df)
+            frames.append(coerce_types(read_any(f)))
         except Exception as e:
             print(f"Skipping {f}: {e}")
 
-    hist = pd.concat(frames, ignore_index=True)
+    if not frames:
+        print(f"No readable daily files in {daily_dir}")
+        return
+    hist = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    if since:
+        # CSV fallback days aren't covered by the dataset filter
+        hist = hist[hist["date"] >= since]
 
     # Deduplicate on team-game identity
     hist = hist.drop_duplicates(subset=["date","game_id","team_id","is_home"], keep="first")
@@ -75,7 +95,7 @@ def main():
     Path(args.out_file).parent.mkdir(parents=True, exist_ok=True)
     # Write via pyarrow to keep types clean
     table = pa.Table.from_pandas(hist)
-    pq.write_table(table, args.out_file)
+    pq.write_table(table, args.out_file, compression="zstd")
 
     n_games = hist[["date","game_id"]].drop_duplicates().shape[0]
     print(f"Saved {len(hist):,} team-rows across {n_games:,} games -> {args.out_file}")
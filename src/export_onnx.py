@@ -0,0 +1,41 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+from joblib import load
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+from src.predict_for_date import MODELS_DIR, X_COLS, _check_feature_order
+
+MODELS = ("baseline_margin", "baseline_win")
+
+
+def export_onnx(models: str | Path = MODELS_DIR) -> list[Path]:
+    """Write <name>.onnx next to each baseline .joblib so predict_for_date can use ONNX Runtime."""
+    written = []
+    for name in MODELS:
+        model = load(Path(models) / f"{name}.joblib")
+        _check_feature_order(model)
+        # probabilities as a plain float tensor (not a list of dicts) so output[1] is an (N, 2) array
+        options = {id(model): {"zipmap": False}} if hasattr(model, "predict_proba") else None
+        onx = convert_sklearn(
+            model,
+            initial_types=[("X", FloatTensorType([None, len(X_COLS)]))],
+            options=options,
+        )
+        out_path = Path(models) / f"{name}.onnx"
+        out_path.write_bytes(onx.SerializeToString())
+        print(f"Saved {out_path}")
+        written.append(out_path)
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export the baseline models to ONNX")
+    ap.add_argument("--models", default=str(MODELS_DIR))
+    args = ap.parse_args()
+    export_onnx(args.models)
+
+
+if __name__ == "__main__":
+    main()
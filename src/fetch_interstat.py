@@ -1,9 +1,11 @@
 # src/data/fetch_interstat.py
 import argparse
 import os
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional
 
+import httpx
+import orjson
 import requests
 import pandas as pd
 
@@ -20,23 +22,112 @@ def _to_int(x, default=None):
             return default
 
 
-def fetch_day(date_str: str, timeout: float = 15.0) -> pd.DataFrame:
+BASE_URL = "https://interst.at/game/mbb"
+HEADERS = {"Accept": "application/json, */*"}
+
+# Raw scoreboard payloads for settled days, one file per date, so rebuilding
+# daily parquet files doesn't go back to the network
+CACHE_DIR = os.environ.get("INTERSTAT_CACHE_DIR", "data/interstat/.httpcache")
+# Only days at least this old are cached; late games can still be in progress a day later
+CACHE_MIN_AGE_DAYS = 2
+
+
+def _cacheable(date_str: str) -> bool:
+    try:
+        day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return False
+    return day <= date.today() - timedelta(days=CACHE_MIN_AGE_DAYS)
+
+
+def _cache_get(date_str: str) -> Optional[bytes]:
+    if not _cacheable(date_str):
+        return None
+    try:
+        with open(os.path.join(CACHE_DIR, f"{date_str}.json"), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _cache_put(date_str: str, content: bytes) -> None:
+    if not _cacheable(date_str):
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"{date_str}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _decode(content: bytes, url: str) -> Dict[str, Any]:
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        raise RuntimeError(f"Non-JSON response from {url[:80]}...")
+
+
+def fetch_day(date_str: str, timeout: float = 15.0,
+              session: Optional[requests.Session] = None, use_cache: bool = True) -> pd.DataFrame:
     """
     Pull Interstat day scoreboard and return TWO rows per game (one per team).
     Columns are intentionally simple so we can build history cleanly.
+    Pass a `session` to reuse one connection across many days.
+    use_cache=False always hits the API (e.g. to pick up corrected scores) and refreshes the cache.
     """
-    url = f"https://interst.at/game/mbb/{date_str}"
-    hdrs = {"Accept": "application/json, */*"}
-    r = requests.get(url, headers=hdrs, timeout=timeout)
+    url = f"{BASE_URL}/{date_str}"
+    cached = _cache_get(date_str) if use_cache else None
+    if cached is not None:
+        return parse_day(_decode(cached, url), date_str)
+
+    r = (session or requests).get(url, headers=HEADERS, timeout=timeout)
     r.raise_for_status()
+    data = _decode(r.content, url)
+    _cache_put(date_str, r.content)
+    return parse_day(data, date_str)
 
-    try:
-        data = r.json()
-    except ValueError:
-        raise RuntimeError(f"Non-JSON response from {url[:80]}...")
 
+async def fetch_day_async(client: httpx.AsyncClient, date_str: str, use_cache: bool = True) -> pd.DataFrame:
+    """Same as fetch_day, but on a shared httpx.AsyncClient so many days can be in flight at once."""
+    url = f"{BASE_URL}/{date_str}"
+    cached = _cache_get(date_str) if use_cache else None
+    if cached is not None:
+        return parse_day(_decode(cached, url), date_str)
+
+    r = await client.get(url, headers=HEADERS)
+    r.raise_for_status()
+    data = _decode(r.content, url)
+    _cache_put(date_str, r.content)
+    return parse_day(data, date_str)
+
+
+# Output columns, in order, with the dtypes applied once the columns are built
+BASE_COLS = [
+    "date", "game_id", "status", "start_time", "overtime",
+    "venue_id", "venue_name", "citystate", "neutral", "attendance",
+    "pbp_count", "playerstatlines_count", "siteurl", "apiurl",
+]
+TEAM_COLS = [
+    "is_home", "team_id", "team_code", "team_name",
+    "opp_id", "opp_code", "opp_name", "pts", "opp_pts", "margin",
+]
+DTYPES = {
+    "game_id": "Int64", "venue_id": "Int64", "team_id": "Int64", "opp_id": "Int64",
+    "attendance": "Int64", "pbp_count": "Int64", "playerstatlines_count": "Int64",
+    "pts": "float64", "opp_pts": "float64", "margin": "float64",
+    "neutral": "bool", "is_home": "bool",
+}
+
+# Low-cardinality text columns; dictionary-encoded in the daily parquet files
+DICT_COLS = ["status", "venue_name", "citystate", "team_code", "team_name", "opp_code", "opp_name"]
+
+
+def parse_day(data: Dict[str, Any], date_str: str) -> pd.DataFrame:
+    """Flatten one scoreboard payload into two team-level rows per game."""
     games: Dict[str, Any] = data.get("games", {})
-    rows: List[Dict[str, Any]] = []
+    # Accumulate column lists (not a dict per row) so the frame is built without per-row key hashing
+    cols: Dict[str, List[Any]] = {c: [] for c in BASE_COLS + TEAM_COLS}
 
     for gkey, g in games.items():
         game_id = g.get("id")
@@ -52,8 +143,8 @@ def fetch_day(date_str: str, timeout: float = 15.0) -> pd.DataFrame:
         v = g.get("visitor", {}) or {}
         h = g.get("home", {}) or {}
 
-        v_id = v.get("id")
-        h_id = h.get("id")
+        v_id = _to_int(v.get("id"), default=None)
+        h_id = _to_int(h.get("id"), default=None)
 
         v_code = (v.get("code") or "") if isinstance(v.get("code"), str) else ""
         h_code = (h.get("code") or "") if isinstance(h.get("code"), str) else ""
@@ -63,74 +154,44 @@ def fetch_day(date_str: str, timeout: float = 15.0) -> pd.DataFrame:
 
         v_pts = _to_int(v.get("score"), default=None)
         h_pts = _to_int(h.get("score"), default=None)
-
-        # Build one row for VIS, one for HOME
-        base = dict(
-            date=gameday,
-            game_id=_to_int(game_id, default=None),
-            status=status,
-            start_time=starttime,
-            overtime=overtime,
-            venue_id=_to_int(venue.get("id"), default=None),
-            venue_name=venue.get("name"),
-            citystate=venue.get("citystate"),
-            neutral=(venue.get("neutral") == "Y"),
-            attendance=_to_int(attendance, default=None),
-            pbp_count=_to_int(meta.get("playbyplay"), default=None),
-            playerstatlines_count=_to_int(meta.get("playerstatlines"), default=None),
-            siteurl=meta.get("siteurl"),
-            apiurl=meta.get("apiurl"),
+        final = v_pts is not None and h_pts is not None
+
+        # Shared game fields, in BASE_COLS order
+        base = (
+            gameday,
+            _to_int(game_id, default=None),
+            status,
+            starttime,
+            overtime,
+            _to_int(venue.get("id"), default=None),
+            venue.get("name"),
+            venue.get("citystate"),
+            venue.get("neutral") == "Y",
+            _to_int(attendance, default=None),
+            _to_int(meta.get("playbyplay"), default=None),
+            _to_int(meta.get("playerstatlines"), default=None),
+            meta.get("siteurl"),
+            meta.get("apiurl"),
         )
 
-        # Visitor row
-        rows.append(
-            dict(
-                **base,
-                is_home=False,
-                team_id=_to_int(v_id, default=None),
-                team_code=v_code,
-                team_name=v_team,
-                opp_id=_to_int(h_id, default=None),
-                opp_code=h_code,
-                opp_name=h_team,
-                pts=v_pts,
-                opp_pts=h_pts,
-                margin=(v_pts - h_pts) if v_pts is not None and h_pts is not None else None,
-            )
+        # One row for VIS, one for HOME, in TEAM_COLS order
+        sides = (
+            (False, v_id, v_code, v_team, h_id, h_code, h_team, v_pts, h_pts,
+             (v_pts - h_pts) if final else None),
+            (True, h_id, h_code, h_team, v_id, v_code, v_team, h_pts, v_pts,
+             (h_pts - v_pts) if final else None),
         )
+        for side in sides:
+            for c, val in zip(BASE_COLS, base):
+                cols[c].append(val)
+            for c, val in zip(TEAM_COLS, side):
+                cols[c].append(val)
 
-        # Home row
-        rows.append(
-            dict(
-                **base,
-                is_home=True,
-                team_id=_to_int(h_id, default=None),
-                team_code=h_code,
-                team_name=h_team,
-                opp_id=_to_int(v_id, default=None),
-                opp_code=v_code,
-                opp_name=v_team,
-                pts=h_pts,
-                opp_pts=v_pts,
-                margin=(h_pts - v_pts) if v_pts is not None and h_pts is not None else None,
-            )
-        )
-
-    df = pd.DataFrame(rows)
+    df = pd.DataFrame(cols).astype(DTYPES)
 
     # Ensure types on key fields
     if not df.empty:
         df["date"] = pd.to_datetime(df["date"]).dt.date
-        for col in ["game_id", "team_id", "opp_id", "attendance", "pbp_count", "playerstatlines_count"]:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
-
-        for col in ["pts", "opp_pts", "margin"]:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        if "is_home" in df.columns:
-            df["is_home"] = df["is_home"].astype(bool)
 
     return df
 
@@ -139,7 +200,11 @@ def save_daily(df: pd.DataFrame, out_dir: str, date_str: str) -> str:
     os.makedirs(out_dir, exist_ok=True)
     out_path = os.path.join(out_dir, f"{date_str}.parquet")
     try:
-        df.to_parquet(out_path, index=False)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, out_path, compression="zstd", compression_level=3,
+                       use_dictionary=DICT_COLS)
         return out_path
     except Exception:
         # Fallback to CSV if pyarrow/fastparquet missing
@@ -153,6 +218,7 @@ def main():
     parser.add_argument("date", help="YYYY-MM-DD")
     parser.add_argument("--out-dir", default="data/interstat/daily", help="Output directory (default: data/interstat/daily)")
     parser.add_argument("--debug", action="store_true", help="Print shape/head after fetch")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the raw payload cache and re-pull")
     args = parser.parse_args()
 
     # Validate date early
@@ -161,7 +227,7 @@ def main():
     except ValueError:
         raise SystemExit("date must be YYYY-MM-DD")
 
-    df = fetch_day(args.date)
+    df = fetch_day(args.date, use_cache=not args.refresh)
     if df.empty:
         print(f"[{args.date}] No games found or empty payload.")
         return
@@ -1,6 +1,11 @@
-import argparse, os, subprocess, sys
+import argparse, asyncio, os
 from datetime import datetime, timedelta, date
 
+import httpx
+import pandas as pd
+
+from .fetch_interstat import fetch_day_async, save_daily
+
 def _daterange(d0: date, d1: date):
     cur = d0
     one = timedelta(days=1)
@@ -8,37 +13,71 @@ def _daterange(d0: date, d1: date):
         yield cur
         cur += one
 
+async def fetch_range(days: list[date], out_dir: str, concurrency: int = 8,
+                      timeout: float = 15.0, debug: bool = False, use_cache: bool = True) -> tuple[int, int]:
+    """Fetch and save every day in `days` over one HTTP client, `concurrency` requests at a time."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(client: httpx.AsyncClient, d: date) -> bool:
+        ds = d.isoformat()
+        try:
+            async with sem:
+                df = await fetch_day_async(client, ds, use_cache=use_cache)
+        except Exception as e:
+            print(f"[{ds}] failed: {e}")
+            return False
+        if df.empty:
+            print(f"[{ds}] No games found or empty payload.")
+            return True
+        out_path = save_daily(df, out_dir, ds)
+        print(f"Saved {len(df)} rows -> {out_path}")
+        if debug:
+            with pd.option_context("display.max_columns", None, "display.width", 200):
+                print(df.head(10))
+        return True
+
+    async with httpx.AsyncClient(timeout=timeout, http2=True) as client:
+        results = await asyncio.gather(*(one(client, d) for d in days))
+    ok = sum(results)
+    return ok, len(results) - ok
+
+def run_range(start: date, end: date, out_dir: str = "data/interstat/daily",
+              skip_existing: bool = True, concurrency: int = 8, debug: bool = False) -> tuple[int, int]:
+    """
+    Fetch every day in [start, end] into `out_dir`; returns (successes, failures).
+    With skip_existing=False days are re-pulled from the API, bypassing the raw payload cache.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    skipped = 0
+    todo = []
+    for d in _daterange(start, end):
+        out_path = os.path.join(out_dir, f"{d.isoformat()}.parquet")
+        if skip_existing and os.path.exists(out_path):
+            print(f"Skip {d.isoformat()} (exists)")
+            skipped += 1
+            continue
+        todo.append(d)
+
+    ok, fail = asyncio.run(fetch_range(todo, out_dir, concurrency, debug=debug, use_cache=skip_existing))
+    print(f"Done. Success={ok + skipped}, Failures={fail}")
+    return ok + skipped, fail
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--start", required=True, help="YYYY-MM-DD")
     ap.add_argument("--end", required=True, help="YYYY-MM-DD")
     ap.add_argument("--out-dir", default="data/interstat/daily")
+    ap.add_argument("--concurrency", type=int, default=8, help="max requests in flight")
     ap.add_argument("--debug", action="store_true")
     ap.add_argument("--no-skip-existing", dest="skip_existing", action="store_false")
     ap.set_defaults(skip_existing=True)
     args = ap.parse_args()
 
-    os.makedirs(args.out_dir, exist_ok=True)
     start = datetime.fromisoformat(args.start).date()
     end = datetime.fromisoformat(args.end).date()
-
-    ok = fail = 0
-    for d in _daterange(start, end):
-        out_path = os.path.join(args.out_dir, f"{d.isoformat()}.parquet")
-        if args.skip_existing and os.path.exists(out_path):
-            print(f"Skip {d.isoformat()} (exists)")
-            ok += 1
-            continue
-        cmd = [sys.executable, "-m", "src.data.fetch_interstat", d.isoformat(), "--out-dir", args.out_dir]
-        if args.debug:
-            cmd.append("--debug")
-        print(" ".join(cmd))
-        r = subprocess.run(cmd)
-        if r.returncode == 0:
-            ok += 1
-        else:
-            fail += 1
-    print(f"Done. Success={ok}, Failures={fail}")
+    run_range(start, end, args.out_dir, skip_existing=args.skip_existing,
+              concurrency=args.concurrency, debug=args.debug)
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,21 @@
 from __future__ import annotations
-import os, sys, subprocess
+import io, os
 from datetime import date, timedelta
 import pandas as pd
 from sqlalchemy import create_engine, text
 
+from src.fetch_interstat_range import run_range
+from src.pipeline.assemble_history import main as assemble_history
+from src.predict_for_date import predict_for_date
+
 DATABASE_URL = os.environ["DATABASE_URL"]
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# psycopg2 driver explicitly (the bare postgresql:// default is psycopg 3 on newer SQLAlchemy)
+# so the board loads through COPY below
+SYNC_DATABASE_URL = (
+    DATABASE_URL.replace("postgres://", "postgresql://", 1)
+                .replace("postgresql://", "postgresql+psycopg2://", 1)
+)
+engine = create_engine(SYNC_DATABASE_URL, pool_pre_ping=True)
 
 CREATE_SQL = """
 CREATE TABLE IF NOT EXISTS predictions (
@@ -23,6 +33,12 @@ CREATE TABLE IF NOT EXISTS predictions (
   PRIMARY KEY (date, game_id)
 );
 """
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_predictions_date_spread
+  ON predictions (date, home_spread, game_id)
+  INCLUDE (home_team_code, home_team_name, away_team_code, away_team_name,
+           prob_home_win, home_moneyline_nv, away_moneyline_nv, pred_home_margin);
+"""
 UPSERT_SQL = """
 INSERT INTO predictions
 (date, game_id, home_team_code, home_team_name, away_team_code, away_team_name,
@@ -42,6 +58,35 @@ ON CONFLICT (date, game_id) DO UPDATE SET
   away_moneyline_nv=EXCLUDED.away_moneyline_nv;
 """
 
+# Board columns in table order, for COPY into the staging table
+COLUMNS = [
+    "date", "game_id", "home_team_code", "home_team_name", "away_team_code", "away_team_name",
+    "pred_home_margin", "home_spread", "prob_home_win", "home_moneyline_nv", "away_moneyline_nv",
+]
+STAGE_SQL = """
+CREATE TEMP TABLE predictions_stage (LIKE predictions) ON COMMIT DROP;
+"""
+MERGE_SQL = """
+INSERT INTO predictions
+(date, game_id, home_team_code, home_team_name, away_team_code, away_team_name,
+ pred_home_margin, home_spread, prob_home_win, home_moneyline_nv, away_moneyline_nv)
+SELECT DISTINCT ON (date, game_id)
+ date, game_id, home_team_code, home_team_name, away_team_code, away_team_name,
+ pred_home_margin, home_spread, prob_home_win, home_moneyline_nv, away_moneyline_nv
+FROM predictions_stage
+ORDER BY date, game_id
+ON CONFLICT (date, game_id) DO UPDATE SET
+  home_team_code=EXCLUDED.home_team_code,
+  home_team_name=EXCLUDED.home_team_name,
+  away_team_code=EXCLUDED.away_team_code,
+  away_team_name=EXCLUDED.away_team_name,
+  pred_home_margin=EXCLUDED.pred_home_margin,
+  home_spread=EXCLUDED.home_spread,
+  prob_home_win=EXCLUDED.prob_home_win,
+  home_moneyline_nv=EXCLUDED.home_moneyline_nv,
+  away_moneyline_nv=EXCLUDED.away_moneyline_nv;
+"""
+
 def season_start_for(d: date) -> date:
     # CBB season starts Nov 1 (previous year if Jan–Oct); fetch only Nov–Apr
     if d.month >= 11:
@@ -49,39 +94,44 @@ def season_start_for(d: date) -> date:
     else:
         return date(d.year, 11, 1) - timedelta(days=365)
 
-def run(cmd: list[str]):
-    print("+", " ".join(cmd), flush=True)
-    subprocess.run(cmd, check=True)
-
 def main():
     today = date.today()
     yday = today - timedelta(days=1)
     start = season_start_for(today)
 
+    # Each step runs in-process (no interpreter startup / pandas re-import per step)
     # 1) Fetch current season (Nov–Apr) through yesterday
-    run([sys.executable, "-m", "src.data.fetch_interstat_range",
-         "--start", start.isoformat(), "--end", yday.isoformat(),
-         "--out-dir", "data/interstat/daily"])
+    run_range(start, yday, out_dir="data/interstat/daily")
 
     # 2) Rebuild games history parquet
-    run([sys.executable, "src/pipeline/assemble_history.py"])
+    assemble_history()
 
     # 3) Predict for today; writes data/interstat/history/board_YYYY-MM-DD.csv
-    run([sys.executable, "src/model/predict_for_date.py", today.isoformat()])
+    csv_path = predict_for_date(today.isoformat())
 
     # 4) Upsert into Postgres for the web app to read
-    csv_path = f"data/interstat/history/board_{today.isoformat()}.csv"
     df = pd.read_csv(csv_path)
+    # add date in case csv doesn't include it or to be safe
+    df["date"] = today.isoformat()
 
     with engine.begin() as conn:
         conn.exec_driver_sql(CREATE_SQL)
-        rows = df.to_dict(orient="records")
-        for r in rows:
-            # ensure plain python types
-            payload = {k: (None if pd.isna(v) else v) for k, v in r.items()}
-            # add date in case csv doesn't include it or to be safe
-            payload["date"] = today.isoformat()
-            conn.execute(text(UPSERT_SQL), payload)
+        conn.exec_driver_sql(INDEX_SQL)
+        if engine.dialect.driver == "psycopg2":
+            # COPY the board into a temp staging table, then merge it in one statement
+            buf = io.StringIO()
+            df[COLUMNS].to_csv(buf, index=False, header=False)  # NaN -> empty -> NULL
+            buf.seek(0)
+            with conn.connection.cursor() as cur:
+                cur.execute(STAGE_SQL)
+                cur.copy_expert(f"COPY predictions_stage ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf)
+                cur.execute(MERGE_SQL)
+        else:
+            # NaN -> None in one vectorized mask (object dtype so None isn't re-cast to NaN)
+            rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+            # one executemany call instead of a round trip per game
+            if rows:
+                conn.execute(text(UPSERT_SQL), rows)
     print(f"Upserted {len(df)} rows for {today.isoformat()}")
 
 if __name__ == "__main__":
@@ -1,10 +1,7 @@
-import os, glob, pandas as pd
+import os, glob, pandas as pd, pyarrow as pa, pyarrow.dataset as ds, pyarrow.parquet as pq
 from datetime import datetime
 from pathlib import Path
 
-def season_start_year(dt: pd.Timestamp) -> int:
-    return dt.year if dt.month >= 11 else dt.year - 1
-
 def main():
     daily_dir = "data/interstat/daily"
     out_dir = "data/interstat/history"
@@ -14,12 +11,10 @@ def main():
     if not files:
         raise SystemExit(f"No parquet files found in {daily_dir}")
 
-    dfs = []
-    for fp in files:
-        df = pd.read_parquet(fp)
-        dfs.append(df)
-
-    df = pd.concat(dfs, ignore_index=True)
+    # One multi-threaded Arrow scan over every daily file (no per-file frames + concat).
+    # Daily files may disagree on numeric widths (all-null days), so widen to a common schema.
+    schema = pa.unify_schemas([pq.read_schema(fp) for fp in files], promote_options="permissive")
+    df = ds.dataset(files, schema=schema, format="parquet").to_table().to_pandas()
 
     # normalize dtypes
     df["date"] = pd.to_datetime(df["date"])
@@ -31,7 +26,7 @@ def main():
     df = df.drop_duplicates(subset=["date","game_id","team_id","is_home"]).sort_values(["date","game_id","is_home"]).reset_index(drop=True)
 
     # add season key like 2024 for 2024-25 season
-    df["season_start"] = df["date"].apply(season_start_year)
+    df["season_start"] = (df["date"].dt.year - (df["date"].dt.month < 11)).astype("int64")
 
     out_path = os.path.join(out_dir, "games_all.parquet")
     df.to_parquet(out_path, index=False)
@@ -1,6 +1,9 @@
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 IN_PATH = Path("data/interstat/history/games_all.parquet")
 OUT_DIR = Path("data/interstat/history")
@@ -9,10 +12,10 @@ OUT_PATH = OUT_DIR / "training_games.parquet"
 OUT_CSV = OUT_DIR / "training_games_sample.csv"
 
 REQUIRED_BASE = ["game_id", "date", "is_home", "pts", "opp_pts", "margin", "start_time"]
+TEAM_COLS = ["team_id", "team_code", "team_name"]
 
 def _ensure_team_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Guarantee team_id / team_code / team_name exist; create fallbacks if missing."""
-    df = df.copy()
     if "team_id" not in df.columns:
         if "team_code" in df.columns and df["team_code"].notna().any():
             df["team_id"] = df["team_code"].fillna("UNK")
@@ -24,11 +27,13 @@ def _ensure_team_columns(df: pd.DataFrame) -> pd.DataFrame:
                              np.where(df.get("is_home", False), "H", "A"))
     if "team_code" not in df.columns:
         if "team_name" in df.columns:
-            df["team_code"] = (
-                df["team_name"].astype(str)
-                .str.upper().str.replace(r"[^A-Z0-9]", "", regex=True)
-                .str[:6]
+            # upper -> strip non-alphanumerics -> first 6, as Arrow kernels (no intermediate pandas string arrays)
+            names = pa.array(df["team_name"].fillna("").astype(str), type=pa.string())
+            codes = pc.utf8_slice_codeunits(
+                pc.replace_substring_regex(pc.utf8_upper(names), pattern=r"[^A-Z0-9]", replacement=""),
+                start=0, stop=6,
             )
+            df["team_code"] = codes.to_numpy(zero_copy_only=False)
         else:
             df["team_code"] = df["team_id"].astype(str)
     if "team_name" not in df.columns:
@@ -36,34 +41,49 @@ def _ensure_team_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 def _to_sort_key(df: pd.DataFrame) -> pd.Series:
-    st = df.get("start_time", "00:00").fillna("00:00").astype(str)
-    d = pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m-%d")
-    return pd.to_datetime(d + " " + st, errors="coerce")
+    # Parse the (few distinct) start times once and add them to the already-normalized date;
+    # avoids formatting every date back to a string and re-parsing it
+    st = pd.to_datetime(df["start_time"].fillna("00:00").astype(str), errors="coerce", cache=True)
+    start_td = (st - st.dt.normalize()).fillna(pd.Timedelta(0))
+    return df["date"] + start_td
 
 def _add_team_rolling(df: pd.DataFrame, window: int = 5) -> pd.DataFrame:
-    df = df.sort_values(["date", "sort_key"], kind="mergesort").copy()
+    """Prior-game rolling features for every team in one vectorized groupby pass."""
+    df = df.sort_values(["team_id", "date", "sort_key"], kind="mergesort")
+    gb = df.groupby("team_id", sort=False)
 
     # prior-game series
-    s_pts = pd.to_numeric(df["pts"], errors="coerce").shift(1)
-    s_opp = pd.to_numeric(df["opp_pts"], errors="coerce").shift(1)
-    s_mgn = pd.to_numeric(df["margin"], errors="coerce").shift(1)
-
-    df["gp_prev"] = np.arange(len(df))
-    df[f"pts_mean_{window}"] = s_pts.rolling(window, min_periods=1).mean()
-    df[f"opp_pts_mean_{window}"] = s_opp.rolling(window, min_periods=1).mean()
-    df[f"margin_mean_{window}"] = s_mgn.rolling(window, min_periods=1).mean()
+    stats = ["pts", "opp_pts", "margin"]
+    prev = gb[stats].shift(1)
+    rolled = (
+        prev.groupby(df["team_id"], sort=False)
+            .rolling(window, min_periods=1)
+            .agg(["mean", "std"])
+            .droplevel(0)
+    )
 
-    df[f"pts_std_{window}"]  = s_pts.rolling(window, min_periods=1).std()
-    df[f"opp_pts_std_{window}"] = s_opp.rolling(window, min_periods=1).std()
-    df[f"margin_std_{window}"] = s_mgn.rolling(window, min_periods=1).std()
+    df["gp_prev"] = gb.cumcount()
+    for c in stats:
+        df[f"{c}_mean_{window}"] = rolled[(c, "mean")]
+        df[f"{c}_std_{window}"] = rolled[(c, "std")]
 
     # days rest (cap to [0,14], default 7 for first)
-    rest = (df["date"] - df["date"].shift(1)).dt.days
+    rest = gb["date"].diff().dt.days
     df["rest_days"] = rest.fillna(7).clip(lower=0, upper=14)
     return df
 
+def _side(df: pd.DataFrame, is_home: bool, prefix: str, cols: list[str]) -> pd.DataFrame:
+    """One side of each game (home or away) with `prefix` on every non-key column."""
+    keys = ("game_id", "date")
+    mask = df["is_home"] if is_home else ~df["is_home"]
+    side = df.loc[mask, cols]
+    return side.rename(columns={c: f"{prefix}{c}" for c in cols if c not in keys})
+
 def main():
-    df = pd.read_parquet(IN_PATH)
+    # Only read the columns we use; team columns are optional (see _ensure_team_columns)
+    available = set(pq.read_schema(IN_PATH).names)
+    columns = [c for c in REQUIRED_BASE + TEAM_COLS if c in available]
+    df = pd.read_parquet(IN_PATH, columns=columns, engine="pyarrow")
 
     # Minimal sanity + types
     missing = [c for c in REQUIRED_BASE if c not in df.columns]
@@ -92,13 +112,10 @@ def main():
         "team_id", "team_code", "team_name",
         "pts", "opp_pts", "margin", "sort_key",
     ]
-    df = df[keep].dropna(subset=["game_id", "date"]).copy()
+    df = df[keep].dropna(subset=["game_id", "date"])
 
     # Rolling features per team
-    df = (
-        df.groupby("team_id", group_keys=False)
-          .apply(_add_team_rolling, window=5)
-    )
+    df = _add_team_rolling(df, window=5)
 
     # Build home/away sides with distinct names
     base_cols = [
@@ -107,32 +124,22 @@ def main():
         "pts_mean_5", "opp_pts_mean_5", "margin_mean_5",
         "pts_std_5", "opp_pts_std_5", "margin_std_5",
     ]
-    h = df[df["is_home"]].loc[:, base_cols].copy()
-    a = df[~df["is_home"]].loc[:, base_cols].copy()
-
-    h.columns = [
-        "game_id","date","home_team_id","home_team_code","home_team_name",
-        "home_pts","home_opp_pts","home_margin","home_gp_prev","home_rest_days",
-        "home_pts_mean_5","home_opp_pts_mean_5","home_margin_mean_5",
-        "home_pts_std_5","home_opp_pts_std_5","home_margin_std_5",
-    ]
-    a.columns = [
-        "game_id","date","away_team_id","away_team_code","away_team_name",
-        "away_pts","away_opp_pts","away_margin","away_gp_prev","away_rest_days",
-        "away_pts_mean_5","away_opp_pts_mean_5","away_margin_mean_5",
-        "away_pts_std_5","away_opp_pts_std_5","away_margin_std_5",
-    ]
+    h = _side(df, True, "home_", base_cols)
+    a = _side(df, False, "away_", base_cols)
+
+    # Training eligibility (both teams have at least 3 prior games); applied per
+    # side before the join so the merge only sees rows that survive it
+    h = h[h["home_gp_prev"] >= 3]
+    a = a[a["away_gp_prev"] >= 3]
 
     # Merge to single row per game
-    g = pd.merge(h, a, on=["game_id", "date"], how="inner").copy()
+    g = pd.merge(h, a, on=["game_id", "date"], how="inner")
 
     # Targets
     g["target_home_margin"] = g["home_pts"] - g["away_pts"]
     g["target_home_win"] = (g["target_home_margin"] > 0).astype(int)
 
-    # Training eligibility (both teams have at least 3 prior games)
-    eligible = (g["home_gp_prev"] >= 3) & (g["away_gp_prev"] >= 3)
-    g_train = g.loc[eligible].sort_values(["date", "game_id"]).reset_index(drop=True)
+    g_train = g.sort_values(["date", "game_id"]).reset_index(drop=True)
 
     # Save
     g_train.to_parquet(OUT_PATH, index=False)
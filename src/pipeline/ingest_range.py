@@ -1,7 +1,14 @@
 # src/pipeline/ingest_range.py
-import argparse, sys, subprocess, os
+import argparse, os
 from datetime import datetime, timedelta
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+
+from src.fetch_interstat import fetch_day, save_daily
+
+# One keep-alive session for the whole range (one TCP/TLS handshake, not one per day)
+SESSION = requests.Session()
 
 def daterange(start_date: str, end_date: str):
     s = datetime.strptime(start_date, "%Y-%m-%d")
@@ -11,20 +18,6 @@ def daterange(start_date: str, end_date: str):
         yield d.strftime("%Y-%m-%d")
         d += timedelta(days=1)
 
-def run_daily(module: str, day: str, daily_dir: str):
-    """Runs your existing daily fetcher module which should write a parquet for that day."""
-    # Expectation: module accepts a single arg (YYYY-MM-DD) and writes to daily_dir/{day}.parquet
-    env = os.environ.copy()
-    # Ensure local src is importable
-    if "." not in sys.path:
-        env["PYTHONPATH"] = env.get("PYTHONPATH", ".")
-        if env["PYTHONPATH"] == ".":
-            pass
-        else:
-            env["PYTHONPATH"] = f".:{env['PYTHONPATH']}"
-    print(f"[ingest] fetching {day} via {module} ...")
-    subprocess.run([sys.executable, "-m", module, day, "--out-dir", daily_dir], check=True)
-
 def build_historical(daily_dir: str, historical_path: str):
     print(f"[ingest] building historical from {daily_dir} -> {historical_path}")
     files = sorted([
@@ -36,52 +29,69 @@ def build_historical(daily_dir: str, historical_path: str):
         print("[ingest] no daily files found")
         return
 
-    # Read in chunks to keep memory light
-    dfs = []
+    # Output schema from every readable footer: a column that is all-null on one day
+    # (type null) is promoted to the type other days use; points are always float
+    schemas = {}
     for fp in files:
         try:
-            df = pd.read_parquet(fp)
-            dfs.append(df)
+            schemas[fp] = pq.read_schema(fp).remove_metadata()
         except Exception as e:
             print(f"[ingest] skip {fp} ({e})")
-
-    if not dfs:
+    if not schemas:
         print("[ingest] nothing readable")
         return
+    schema = pa.unify_schemas(list(schemas.values()), promote_options="permissive")
+    for c in ("pts", "opp_pts"):
+        if c in schema.names:
+            schema = schema.set(schema.get_field_index(c), pa.field(c, pa.float64()))
 
-    df = pd.concat(dfs, ignore_index=True)
-
-    # Canonical keys + light cleanup
-    required = ["date", "game_id", "team_id"]
-    for col in required:
-        if col not in df.columns:
+    # Stream one day at a time into a single writer so memory stays bounded
+    # by the largest daily file rather than the whole history
+    keys = ["date", "game_id", "team_id"]
+    for col in keys:
+        if col not in schema.names:
             raise RuntimeError(f"expected column '{col}' in daily parquet")
+    os.makedirs(os.path.dirname(historical_path), exist_ok=True)
+    writer = pq.ParquetWriter(historical_path, schema, compression="zstd")
+    seen = set()
+    n_rows = 0
+    try:
+        for fp in schemas:
+            try:
+                t = pq.read_table(fp)
+            except Exception as e:
+                print(f"[ingest] skip {fp} ({e})")
+                continue
 
-    # De-dupe in case you re-fetch a day
-    df = df.drop_duplicates(subset=["date", "game_id", "team_id"]).sort_values(["date","game_id","team_id"])
+            # Columns a day lacks are written as nulls
+            cols = [
+                t.column(f.name) if f.name in t.column_names else pa.nulls(t.num_rows, f.type)
+                for f in schema
+            ]
+            t = pa.Table.from_arrays(cols, names=schema.names).cast(schema)
 
-    # Strong dtypes where reasonable
-    for c in ["pts","opp_pts"]:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
+            # De-dupe in case you re-fetch a day (first occurrence wins)
+            mask = [k not in seen and not seen.add(k)
+                    for k in zip(*(t.column(c).to_pylist() for c in keys))]
+            t = t.filter(pa.array(mask, type=pa.bool_()))
+            t = t.sort_by([(c, "ascending") for c in keys])
+            writer.write_table(t)
+            n_rows += t.num_rows
+    finally:
+        writer.close()
 
-    # Write historical
-    os.makedirs(os.path.dirname(historical_path), exist_ok=True)
-    df.to_parquet(historical_path, index=False)
-    print(f"[ingest] wrote {len(df):,} rows to {historical_path}")
+    print(f"[ingest] wrote {n_rows:,} rows to {historical_path}")
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--start", required=True, help="YYYY-MM-DD")
     ap.add_argument("--end", required=True, help="YYYY-MM-DD")
-    ap.add_argument("--module", default="src.data.fetch_interstat",
-                    help="module to run for a single day fetch")
     ap.add_argument("--daily-dir", default="data/interstat/daily",
                     help="where daily parquet files are written")
     ap.add_argument("--historical-path", default="data/interstat/historical.parquet",
                     help="output historical parquet path")
     ap.add_argument("--refresh-daily", action="store_true",
-                    help="re-pull even if a daily file exists")
+                    help="re-pull from the API even if a daily file or cached payload exists")
     args = ap.parse_args()
 
     os.makedirs(args.daily_dir, exist_ok=True)
@@ -92,7 +102,12 @@ def main():
         if os.path.exists(out_fp) and not args.refresh_daily:
             print(f"[ingest] {day} exists -> {out_fp} (skip)")
             continue
-        run_daily(args.module, day, args.daily_dir)
+        print(f"[ingest] fetching {day} ...")
+        df = fetch_day(day, session=SESSION, use_cache=not args.refresh_daily)
+        if df.empty:
+            print(f"[ingest] {day}: no games")
+            continue
+        save_daily(df, args.daily_dir, day)
 
     # 2) build historical
     build_historical(args.daily_dir, args.historical_path)
@@ -1,50 +1,134 @@
 from __future__ import annotations
 import argparse
+import hashlib
+import os
+import warnings
+from functools import lru_cache
 from pathlib import Path
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 from joblib import load
 
+try:  # optional: run exported baselines through ONNX Runtime (see src/export_onnx.py)
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
 HIST_GAMES = Path("data/interstat/history/games_all.parquet")
 DAILY_DIR = Path("data/interstat/daily")
 OUT_DIR = Path("data/interstat/history")
 MODELS_DIR = Path("models")
+ASOF_CACHE_DIR = Path("data/interstat/cache")
+
+# Only these columns are read from the history / daily files (parquet projection pushdown)
+HIST_COLS = ["team_id", "date", "game_id", "pts", "opp_pts"]
+DAILY_COLS = ["date", "game_id", "team_id", "team_code", "team_name", "opp_id", "opp_code", "opp_name", "is_home"]
+
+
+# Numba kernels for the rolling mean/std (and the X build). JIT compile is paid once per
+# process, so this is opt-in (--rolling-engine numba) for long histories / batch runs; requires numba.
+NUMBA_KWARGS = {"nopython": True, "nogil": True, "parallel": True}
+
+
+# Per-team as-of features, and the model inputs built from them (home minus away; gp_prev summed)
+FEATURE_COLS = ["pts_mean_5", "opp_pts_mean_5", "margin_mean_5", "pts_std_5", "opp_pts_std_5", "rest_days", "gp_prev"]
+X_COLS = [f"diff_{c}" for c in FEATURE_COLS[:-1]] + ["sum_gp_prev"]
+# Rolling stats behind the *_5 features; margin_std is not a model input so it is never computed
+ROLL_STATS = {"pts": ["mean", "std"], "opp_pts": ["mean", "std"], "margin": ["mean"]}
 
 
 # ---------- helpers ----------
-def _add_team_rolling(df: pd.DataFrame, window: int = 5) -> pd.DataFrame:
-    """Compute rolling team features within a single team's history."""
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
-    df = df.sort_values(["date", "game_id"], kind="mergesort")
-
-    # rolling means/stds of points and margin using prior games only (shift)
-    for col in ("pts", "opp_pts"):
-        roll = df[col].rolling(window, min_periods=1)
-        df[f"{col}_mean_{window}"] = roll.mean().shift(1)
-        df[f"{col}_std_{window}"] = roll.std().shift(1)
-    df[f"margin_mean_{window}"] = (df["pts"] - df["opp_pts"]).rolling(window, min_periods=1).mean().shift(1)
+def _add_team_rolling(df: pd.DataFrame, window: int = 5, engine: str = "cython") -> pd.DataFrame:
+    """Compute rolling team features for every team's history in one groupby pass."""
+    df = df.sort_values(["team_id", "date", "game_id"], kind="mergesort")
+    df["margin"] = df["pts"] - df["opp_pts"]
+    gb = df.groupby("team_id", sort=False)
+
+    # rolling stats the model uses, over prior games only (shift within each team)
+    prev = gb[list(ROLL_STATS)].shift(1)
+    grp = prev.groupby(df["team_id"], sort=False)
+    if engine == "numba":
+        # numba kernels are per-method (agg() takes no engine), so std only covers the columns needing it
+        kw = {"engine": "numba", "engine_kwargs": NUMBA_KWARGS}
+        std_cols = [c for c, funcs in ROLL_STATS.items() if "std" in funcs]
+        means = grp.rolling(window, min_periods=1).mean(**kw)
+        stds = grp[std_cols].rolling(window, min_periods=1).std(**kw)
+        rolled = pd.concat({"mean": means, "std": stds}, axis=1).swaplevel(axis=1)
+    else:
+        rolled = grp.rolling(window, min_periods=1).agg(ROLL_STATS)
+    # the cython path prefixes the team key to the index; pandas' numba path does not
+    if rolled.index.nlevels > 1:
+        rolled = rolled.droplevel(0)
+    for col, func in rolled.columns:
+        df[f"{col}_{func}_{window}"] = rolled[(col, func)]
 
     # rest days since prior game
-    df["rest_days"] = (df["date"] - df["date"].shift(1)).dt.days
-    df["rest_days"] = df["rest_days"].fillna(7).clip(lower=0)
+    df["rest_days"] = gb["date"].diff().dt.days.fillna(7).clip(lower=0)
 
     # prior games played (0 for first game, 1 for second, etc.)
-    df["gp_prev"] = pd.Series(range(len(df)), index=df.index).astype(float)
+    df["gp_prev"] = gb.cumcount().to_numpy(dtype=np.float64, copy=False)
 
     return df
 
 
-def _prefix_except(df: pd.DataFrame, prefix: str, skip: tuple[str, ...] = ("team_id",)) -> pd.DataFrame:
-    """Add a prefix to all columns except those in `skip`."""
-    rename_map = {c: f"{prefix}{c}" for c in df.columns if c not in skip}
-    return df.rename(columns=rename_map)
+@lru_cache(maxsize=1)
+def _build_X_numba():
+    """Fused diff/sum/NaN->0 kernel; numba is imported and the kernel compiled only on first use."""
+    from numba import njit, prange
+
+    # fastmath without "nnan": the NaN checks below must not be optimized away
+    @njit(parallel=True, fastmath={"nsz", "arcp", "contract", "afn", "reassoc"}, cache=True)
+    def kernel(home, away, out):
+        last = home.shape[1] - 1
+        for i in prange(home.shape[0]):
+            for j in range(last):
+                v = home[i, j] - away[i, j]
+                out[i, j] = 0.0 if np.isnan(v) else v
+            v = home[i, last] + away[i, last]
+            out[i, last] = 0.0 if np.isnan(v) else v
+
+    return kernel
 
 
-def prob_to_american(p: float) -> float:
-    if p is None or np.isnan(p) or p <= 0 or p >= 1:
-        return np.nan
-    return -100.0 * p / (1.0 - p) if p >= 0.5 else 100.0 * (1.0 - p) / p
+def _build_X(home: np.ndarray, away: np.ndarray, engine: str = "cython") -> np.ndarray:
+    """Home minus away for every feature except games played, which is summed; NaN -> 0. Columns follow X_COLS."""
+    X = np.empty((home.shape[0], len(X_COLS)), dtype=np.float32)
+    if engine == "numba":
+        _build_X_numba()(home, away, X)
+        return X
+    np.subtract(home[:, :-1], away[:, :-1], out=X[:, :-1])
+    np.add(home[:, -1], away[:, -1], out=X[:, -1])
+    np.nan_to_num(X, copy=False, nan=0.0)
+    return X
+
+
+def _as_day(s: pd.Series) -> pd.Series:
+    """Day-resolution dates; ISO strings parse with a fixed, memoized format and datetimes pass through."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    days = pd.to_datetime(s, format="%Y-%m-%d", cache=True).to_numpy().astype("datetime64[D]")
+    return pd.Series(days, index=s.index, name=s.name)
+
+
+def _check_feature_order(model) -> None:
+    """Models fit on a DataFrame remember their column order; make sure X_COLS still matches it."""
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None and list(names) != X_COLS:
+        raise RuntimeError(f"{type(model).__name__} expects features {list(names)}, got {X_COLS}")
+
+
+def probs_to_american(p: np.ndarray) -> np.ndarray:
+    """No-vig American odds for an array of win probabilities (NaN outside (0, 1)), rounded."""
+    p = np.asarray(p, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fav = -100.0 * p / (1.0 - p)
+        dog = 100.0 * (1.0 - p) / p
+        out = np.where(p >= 0.5, fav, dog)
+    out[~((p > 0) & (p < 1))] = np.nan  # also catches NaN p
+    return np.rint(out)
 
 
 def build_pairs_for_date(target_date: str) -> pd.DataFrame:
@@ -52,18 +136,17 @@ def build_pairs_for_date(target_date: str) -> pd.DataFrame:
     Build one row per game for `target_date` with home/away IDs and labels,
     reading daily file from parquet (preferred) or csv fallback.
     """
-    import os
-
     base = DAILY_DIR / target_date
     f_parq = f"{base}.parquet"
     f_csv = f"{base}.csv"
 
     if os.path.exists(f_parq):
-        df = pd.read_parquet(f_parq)
+        df = pd.read_parquet(f_parq, columns=DAILY_COLS, engine="pyarrow")
     elif os.path.exists(f_csv):
-        df = pd.read_csv(f_csv)
+        df = pd.read_csv(f_csv, usecols=DAILY_COLS)
     else:
         raise FileNotFoundError(f"Missing daily file for {target_date}: {f_parq} or {f_csv}")
+    df["date"] = _as_day(df["date"])
 
     # Expect one row per team per game with `is_home`
     home = df[df["is_home"]].rename(
@@ -73,38 +156,15 @@ def build_pairs_for_date(target_date: str) -> pd.DataFrame:
         columns={"team_id": "away_team_id", "team_code": "away_team_code", "team_name": "away_team_name"}
     )
 
-    # Start from the home rows, use opp_* if present, then overwrite with away table if available
-    pairs = home[
-        [
-            "date",
-            "game_id",
-            "home_team_id",
-            "home_team_code",
-            "home_team_name",
-            "opp_id",
-            "opp_code",
-            "opp_name",
-        ]
-    ].rename(
-        columns={
-            "opp_id": "away_team_id",
-            "opp_code": "away_team_code",
-            "opp_name": "away_team_name",
-        }
-    )
-
-    pairs = pairs.merge(
-        away[["game_id", "away_team_id", "away_team_code", "away_team_name"]],
-        on="game_id",
-        how="left",
-        suffixes=("", "_awaytbl"),
-    )
-
-    for col in ("away_team_id", "away_team_code", "away_team_name"):
-        aux = f"{col}_awaytbl"
-        if aux in pairs:
-            pairs[col] = pairs[col].fillna(pairs[aux])
-            pairs.drop(columns=[aux], inplace=True)
+    # Start from the home rows keyed by game_id, use opp_* if present, then fill gaps from the
+    # away rows by index alignment (no merge, no suffix columns to reconcile)
+    away_cols = ["away_team_id", "away_team_code", "away_team_name"]
+    pairs = home.set_index("game_id")[
+        ["date", "home_team_id", "home_team_code", "home_team_name", "opp_id", "opp_code", "opp_name"]
+    ].rename(columns=dict(zip(["opp_id", "opp_code", "opp_name"], away_cols)))
+    away_ix = away.drop_duplicates("game_id").set_index("game_id")[away_cols]
+    pairs[away_cols] = pairs[away_cols].fillna(away_ix)
+    pairs = pairs.reset_index()
 
     # Normalize dtypes for future merges
     for col in ("home_team_id", "away_team_id"):
@@ -123,107 +183,197 @@ def build_pairs_for_date(target_date: str) -> pd.DataFrame:
             "away_team_code",
             "away_team_name",
         ]
-    ].copy()
+    ]
 
 
-def _features_from_pairs(pairs: pd.DataFrame, asof_roll: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+def _features_from_pairs(pairs: pd.DataFrame, asof_roll: pd.DataFrame,
+                         engine: str = "cython") -> tuple[np.ndarray, pd.DataFrame]:
     """
-    Join latest per-team rolling features to home/away teams and build model matrix X.
+    Look up latest per-team rolling features for home/away teams and build model matrix X.
     """
-    # Ensure IDs are strings to avoid int/object merge errors
-    pairs = pairs.copy()
-    for col in ("home_team_id", "away_team_id"):
-        pairs[col] = pairs[col].astype("string")
-
-    asof = asof_roll.copy()
-    asof["team_id"] = asof["team_id"].astype("string")
-
-    home_feats = _prefix_except(asof, "home_", skip=("team_id",))
-    away_feats = _prefix_except(asof, "away_", skip=("team_id",))
-
-    g = pairs.merge(home_feats, left_on="home_team_id", right_on="team_id", how="left").drop(columns=["team_id"])
-    g = g.merge(away_feats, left_on="away_team_id", right_on="team_id", how="left").drop(columns=["team_id"])
-
-    # Coerce numeric feature columns and build differences/sums
-    num_cols = [
-        "pts_mean_5",
-        "opp_pts_mean_5",
-        "margin_mean_5",
-        "pts_std_5",
-        "opp_pts_std_5",
-        "rest_days",
-        "gp_prev",
-    ]
-    for c in num_cols:
-        g[f"home_{c}"] = pd.to_numeric(g.get(f"home_{c}"), errors="coerce")
-        g[f"away_{c}"] = pd.to_numeric(g.get(f"away_{c}"), errors="coerce")
-
-    X = pd.DataFrame(index=g.index)
-    X["diff_pts_mean_5"] = g["home_pts_mean_5"] - g["away_pts_mean_5"]
-    X["diff_opp_pts_mean_5"] = g["home_opp_pts_mean_5"] - g["away_opp_pts_mean_5"]
-    X["diff_margin_mean_5"] = g["home_margin_mean_5"] - g["away_margin_mean_5"]
-    X["diff_pts_std_5"] = g["home_pts_std_5"] - g["away_pts_std_5"]
-    X["diff_opp_pts_std_5"] = g["home_opp_pts_std_5"] - g["away_opp_pts_std_5"]
-    X["diff_rest_days"] = g["home_rest_days"] - g["away_rest_days"]
-    X["sum_gp_prev"] = g["home_gp_prev"] + g["away_gp_prev"]
-    X = X.fillna(0.0)
+    # Ensure IDs are strings to avoid int/object mismatches, then share one categorical
+    # dtype across all three key columns so the lookups compare integer codes.
+    # Neither input is mutated, so no defensive copies are needed.
+    ids = {
+        "home_team_id": pairs["home_team_id"].astype("string"),
+        "away_team_id": pairs["away_team_id"].astype("string"),
+        "team_id": asof_roll["team_id"].astype("string"),
+    }
+    team_cat = pd.CategoricalDtype(categories=pd.unique(pd.concat(ids.values()).dropna()))
+    ids = {col: s.astype(team_cat) for col, s in ids.items()}
+
+    # asof is unique per team: gather each side's feature rows by position instead of two merges.
+    # A trailing all-NaN row catches teams with no history (get_indexer returns -1 for misses).
+    feats = asof_roll[FEATURE_COLS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32)
+    feats = np.vstack([feats, np.full((1, len(FEATURE_COLS)), np.nan, dtype=np.float32)])
+    team_index = pd.Index(ids["team_id"])
+    home = feats[team_index.get_indexer(ids["home_team_id"])]
+    away = feats[team_index.get_indexer(ids["away_team_id"])]
+
+    # float32 because the tree baselines cast X to float32 internally anyway (no extra copy)
+    X = _build_X(home, away, engine=engine)
+    g = pairs
 
     return X, g
 
 
-# ---------- main ----------
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("date", help="YYYY-MM-DD to predict")
-    ap.add_argument("--hist", default=str(HIST_GAMES))
-    ap.add_argument("--models", default=str(MODELS_DIR))
-    ap.add_argument("--out-dir", default=str(OUT_DIR))
-    args = ap.parse_args()
+def _asof_cache_path(hist: str | Path, date_target: pd.Timestamp, window: int) -> Path:
+    """
+    Cache file for one (history file version, feature definition, target date); a rewritten
+    history or a change to the rolling features gets a new key.
+    """
+    st = os.stat(hist)
+    key = (f"{Path(hist).resolve()}|{st.st_mtime_ns}|{st.st_size}|{date_target.date()}"
+           f"|{window}|{FEATURE_COLS}|{ROLL_STATS}")
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return ASOF_CACHE_DIR / f"asof_{date_target.date()}_{digest}.parquet"
 
-    date_target = pd.Timestamp(args.date).normalize()
 
-    # Load game history and build as-of (day-1) rolling features
-    games = pd.read_parquet(args.hist)
-    games["date"] = pd.to_datetime(games["date"]).dt.normalize()
+def _load_games(hist: str | Path) -> pd.DataFrame:
+    games = pd.read_parquet(hist, columns=HIST_COLS, engine="pyarrow")
+    games["date"] = _as_day(games["date"])
+    return games
 
-    hist = games.loc[games["date"] < date_target].copy()
 
-    roll = (
-        hist.sort_values(["team_id", "date", "game_id"])
-        .groupby("team_id", group_keys=False)
-        .apply(_add_team_rolling, window=5)
-    )
+def build_asof(hist: str | Path, date_target: pd.Timestamp, rolling_engine: str = "cython",
+               window: int = 5) -> pd.DataFrame:
+    """Latest rolling features per team from games strictly before `date_target` (cached on disk)."""
+    cache_path = _asof_cache_path(hist, date_target, window)
+    if cache_path.exists():
+        return pd.read_parquet(cache_path)
+
+    games = _load_games(hist)
 
+    # plain numpy comparison; _add_team_rolling sorts into a new frame, so no defensive copy
+    prior = games[games["date"].to_numpy() < date_target.to_datetime64()]
+
+    roll = _add_team_rolling(prior, window=window, engine=rolling_engine)
+
+    # roll is already sorted by team/date/game_id, so each team's last row is its as-of snapshot
     asof = (
-        roll.sort_values(["team_id", "date", "game_id"])
-        .groupby("team_id", as_index=False)
-        .tail(1)
-        .loc[
-            :,
-            [
-                "team_id",
-                "pts_mean_5",
-                "opp_pts_mean_5",
-                "margin_mean_5",
-                "pts_std_5",
-                "opp_pts_std_5",
-                "rest_days",
-                "gp_prev",
-            ],
-        ]
+        roll.drop_duplicates("team_id", keep="last")
+        .loc[:, ["team_id", *FEATURE_COLS]]
         .reset_index(drop=True)
     )
 
+    # One file per target date: entries for older history versions / feature sets are dead
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    for old in cache_path.parent.glob(f"asof_{date_target.date()}_*.parquet"):
+        old.unlink(missing_ok=True)
+    asof.to_parquet(cache_path, index=False, compression="zstd")
+    return asof
+
+
+def _asof_for_dates(roll: pd.DataFrame, targets: list[pd.Timestamp]) -> list[pd.DataFrame]:
+    """
+    As-of snapshots (last row per team dated before each target) from one full-history
+    rolling frame. Rows only see earlier games, so this matches build_asof date by date.
+    """
+    roll = roll[roll["team_id"].notna()]
+    # roll is sorted by team/date, so factorized team codes ascend and (code, day) keys are monotone
+    team_codes, teams = pd.factorize(roll["team_id"], sort=False)
+    days = roll["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    lo = days.min() if len(days) else 0
+    width = (days.max() - lo + 2) if len(days) else 1
+    keys = team_codes.astype(np.int64) * width + (days - lo)
+    team_base = np.arange(len(teams), dtype=np.int64) * width
+    feats = roll.loc[:, ["team_id", *FEATURE_COLS]]
+
+    snapshots = []
+    for t in targets:
+        day = np.int64(t.to_datetime64().astype("datetime64[D]").astype(np.int64))
+        # index of each team's last key strictly below (team, target day); -1 / other team = no history
+        pos = np.searchsorted(keys, team_base + np.clip(day - lo, 0, width - 1), side="left") - 1
+        has_hist = pos >= 0
+        has_hist[has_hist] = team_codes[pos[has_hist]] == np.flatnonzero(has_hist)
+        snapshots.append(feats.iloc[pos[has_hist]].reset_index(drop=True))
+    return snapshots
+
+
+class _OnnxModel:
+    """predict / predict_proba over an ONNX Runtime session, for float32 X in X_COLS order."""
+
+    def __init__(self, path: Path):
+        self.sess = ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+        self.input_name = self.sess.get_inputs()[0].name
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.sess.run(None, {self.input_name: X})[0].ravel()
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.sess.run(None, {self.input_name: X})[1]
+
+
+def _load_model(models: Path, name: str):
+    """
+    `name`.onnx when exported from the current joblib and onnxruntime is installed, else the
+    joblib estimator (memory-mapped). An .onnx older than its .joblib is stale and ignored.
+    """
+    onnx_path = models / f"{name}.onnx"
+    joblib_path = models / f"{name}.joblib"
+    if ort is not None and onnx_path.exists():
+        if onnx_path.stat().st_mtime >= joblib_path.stat().st_mtime:
+            return _OnnxModel(onnx_path)
+        warnings.warn(f"{onnx_path} is older than {joblib_path}; using the joblib model "
+                      f"(re-run python -m src.export_onnx to refresh it)")
+    return load(joblib_path, mmap_mode="r")
+
+
+@lru_cache(maxsize=4)
+def _load_models(models: str):
+    """Load both baselines once per process."""
+    return _load_model(Path(models), "baseline_margin"), _load_model(Path(models), "baseline_win")
+
+
+# ---------- main ----------
+def predict_for_date(target_date: str, hist: str | Path = HIST_GAMES, models: str | Path = MODELS_DIR,
+                     out_dir: str | Path = OUT_DIR, rolling_engine: str = "cython") -> Path:
+    """Predict every game on `target_date` and write board_{date}.csv to `out_dir`; returns its path."""
+    date_target = pd.Timestamp(target_date).normalize()
+
+    # As-of (day-1) rolling features
+    asof = build_asof(hist, date_target, rolling_engine=rolling_engine)
+    return _predict_board(target_date, asof, models, out_dir, engine=rolling_engine)
+
+
+def predict_for_dates(dates: list[str], hist: str | Path = HIST_GAMES, models: str | Path = MODELS_DIR,
+                      out_dir: str | Path = OUT_DIR, rolling_engine: str = "cython",
+                      skip_missing: bool = True) -> list[Path]:
+    """
+    Batch version of predict_for_date for backtests: history is read and rolled once and the
+    models are loaded once; each date then only needs an as-of lookup, pairs and predict.
+    Dates without a daily file (no games that day) are skipped unless `skip_missing` is False.
+    Returns the paths of the boards written.
+    """
+    roll = _add_team_rolling(_load_games(hist), window=5, engine=rolling_engine)
+    targets = [pd.Timestamp(d).normalize() for d in dates]
+    snapshots = _asof_for_dates(roll, targets)
+    written = []
+    for d, asof in zip(dates, snapshots):
+        has_daily = any((DAILY_DIR / f"{d}{ext}").exists() for ext in (".parquet", ".csv"))
+        if skip_missing and not has_daily:
+            print(f"[predict] skip {d} (no daily file in {DAILY_DIR})")
+            continue
+        written.append(_predict_board(d, asof, models, out_dir, engine=rolling_engine))
+    return written
+
+
+def _predict_board(target_date: str, asof: pd.DataFrame, models: str | Path, out_dir: str | Path,
+                   engine: str = "cython") -> Path:
     # Build today’s game pairs and features
-    pairs = build_pairs_for_date(args.date)
-    X, g = _features_from_pairs(pairs, asof)
+    pairs = build_pairs_for_date(target_date)
+    X, g = _features_from_pairs(pairs, asof, engine=engine)
 
     # Load baselines and predict
-    m_margin = load(Path(args.models) / "baseline_margin.joblib")
-    m_win = load(Path(args.models) / "baseline_win.joblib")
+    m_margin, m_win = _load_models(str(models))
 
-    pred_home_margin = m_margin.predict(X).astype(float)
-    prob_home = m_win.predict_proba(X)[:, 1].astype(float)
+    for m in (m_margin, m_win):
+        _check_feature_order(m)
+    with warnings.catch_warnings():
+        # X is a bare ndarray in X_COLS order (checked above); skip sklearn's feature-name warning
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        pred_home_margin = m_margin.predict(X).astype(float)
+        prob_home = m_win.predict_proba(X)[:, 1].astype(float)
 
     # Assemble board
     out = g.loc[
@@ -236,21 +386,45 @@ def main():
             "away_team_code",
             "away_team_name",
         ],
-    ].copy()
+    ]
 
     out["pred_home_margin"] = pred_home_margin
     out["home_spread"] = -pred_home_margin  # negative -> home favored
     out["prob_home_win"] = prob_home
-    out["home_moneyline_nv"] = np.rint([prob_to_american(p) for p in prob_home]).astype("float")
-    out["away_moneyline_nv"] = np.rint([prob_to_american(1.0 - p) for p in prob_home]).astype("float")
+    out["home_moneyline_nv"] = probs_to_american(prob_home)
+    out["away_moneyline_nv"] = probs_to_american(1.0 - prob_home)
 
     out = out.sort_values(["date", "game_id"]).reset_index(drop=True)
 
-    Path(args.out_dir).mkdir(parents=True, exist_ok=True)
-    out_path = Path(args.out_dir) / f"board_{args.date}.csv"
-    out.to_csv(out_path, index=False)
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    out_path = Path(out_dir) / f"board_{target_date}.csv"
+    # Arrow's C++ CSV writer; date as date32 so the column stays plain YYYY-MM-DD for COPY / read_csv
+    tbl = pa.Table.from_pandas(out, preserve_index=False)
+    tbl = tbl.set_column(tbl.schema.get_field_index("date"), "date", pc.cast(tbl["date"], pa.date32()))
+    pacsv.write_csv(tbl, out_path)
     print(f"Saved board -> {out_path}  rows={len(out)}")
     print(out.head(min(12, len(out))).to_string(index=False))
+    return out_path
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("date", nargs="+", help="YYYY-MM-DD to predict (several dates run as one batch)")
+    ap.add_argument("--hist", default=str(HIST_GAMES))
+    ap.add_argument("--models", default=str(MODELS_DIR))
+    ap.add_argument("--out-dir", default=str(OUT_DIR))
+    ap.add_argument("--rolling-engine", choices=("cython", "numba"), default="cython",
+                    help="pandas rolling engine (numba also builds X with a JIT kernel); needs the numba package")
+    args = ap.parse_args()
+
+    # Column selections and renames share buffers instead of copying; always on from pandas 3
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+    kw = dict(hist=args.hist, models=args.models, out_dir=args.out_dir, rolling_engine=args.rolling_engine)
+    if len(args.date) == 1:
+        predict_for_date(args.date[0], **kw)
+    else:
+        predict_for_dates(args.date, **kw)
 
 
 if __name__ == "__main__":